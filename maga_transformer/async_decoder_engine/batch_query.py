@@ -2,7 +2,7 @@ import copy
 import torch
 import logging
 import numpy as np
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from threading import Lock
 from pydantic import BaseModel
 from PIL import Image
@@ -44,6 +44,8 @@ class BatchQuery:
         self.num_beams: int = 1
         self.cache_block_indice: torch.Tensor = torch.zeros((1,1), dtype=torch.int32)
         self.output_token_ids: torch.Tensor = torch.zeros((1,1), dtype=torch.int32)
+        # flat storage reused by output_token_ids across steps, grown on demand
+        self._output_token_ids_buffer: torch.Tensor = torch.zeros((0,), dtype=torch.int32)
         self.images: List[Any] = []
         self.generate_configs: List[GenerateConfig] = []
         self.merge_generate_config: GenerateConfig = GenerateConfig()
@@ -75,7 +77,9 @@ class BatchQuery:
         new_batch_query.generate_batch_size = self.generate_batch_size
         new_batch_query.context_batch_size = self.context_batch_size
         new_batch_query.cache_block_indice = copy.deepcopy(self.cache_block_indice)
-        new_batch_query.output_token_ids = copy.deepcopy(self.output_token_ids)
+        # output_token_ids is a view into a larger reused buffer, clone copies only the view
+        new_batch_query.output_token_ids = \
+            self.output_token_ids.clone() if self.output_token_ids is not None else None
         new_batch_query.images = copy.deepcopy(self.images)
         new_batch_query.generate_configs = self.generate_configs
         new_batch_query.merge_generate_config = self.merge_generate_config
@@ -207,12 +211,6 @@ class BatchQuery:
 
         return self.token_type_ids[index, start_index: end_index]
 
-    def generate_query_last_token(self, index: int) -> torch.Tensor:
-        assert index < self.generate_batch_size
-        start_idx = index * self.num_beams
-        end_idx = (index + 1) * self.num_beams
-        return self.output_token_ids[start_idx: end_idx, self.seq_lengths_list[start_idx] - 1]
-
     def check(self):
         assert len(self.context_lengths_list) == self.decoder_batch_size
         assert len(self.reuse_lengths_list) == self.decoder_batch_size
@@ -268,24 +266,26 @@ class BatchQuery:
             [self.decoder_batch_size, max([len(q.block_indice[0]) for q in self.streams])],
             dtype=np.int32
         )
-        output_token_ids = np.zeros(
-            [self.decoder_batch_size, max([q.seq_length for q in self.streams]) + self.gen_num_per_circle],
-            dtype=np.int32
-        )
+        output_token_ids = self._alloc_output_token_ids(
+            self.decoder_batch_size, max([q.seq_length for q in self.streams]) + self.gen_num_per_circle)
 
         token_type_ids = np.zeros((0, 0), dtype=np.int32)
         if self.use_expect_attention:
             token_type_ids = np.zeros((len(self.context_streams), output_token_ids.shape[1]), dtype=np.int32)
 
+        # loop invariants, hoisted since this runs for every decode stream on every step
+        num_beams = self.num_beams
+        decode_reuse_factor = 1 - int(self._ptuning_info.count_prefix_length)
         for idx, stream in enumerate(self.decode_streams):
-            start_batch_idx = idx * self.num_beams
-            end_batch_idx = start_batch_idx + self.num_beams
+            start_batch_idx = idx * num_beams
+            end_batch_idx = start_batch_idx + num_beams
+            seq_length = stream.seq_length
             cache_block_indice[start_batch_idx:end_batch_idx, :len(stream.block_indice[0])] = stream.block_indice
-            output_token_ids[start_batch_idx:end_batch_idx, :stream.seq_length] = stream.complete_token_ids
-            self.seq_lengths_list.extend([stream.seq_length] * self.num_beams)
-            self.reuse_lengths_list.extend([stream.reuse_length * (1 - int(self._ptuning_info.count_prefix_length))] * self.num_beams)
-            self.context_lengths_list.extend([stream.input_length] * self.num_beams)
-            self.vision_token_length.extend([stream.input.vision_token_length] * self.num_beams)
+            output_token_ids[start_batch_idx:end_batch_idx, :seq_length] = stream.complete_token_ids
+            self.seq_lengths_list.extend([seq_length] * num_beams)
+            self.reuse_lengths_list.extend([stream.reuse_length * decode_reuse_factor] * num_beams)
+            self.context_lengths_list.extend([stream.input_length] * num_beams)
+            self.vision_token_length.extend([stream.input.vision_token_length] * num_beams)
 
         images = []
         for idx, stream in enumerate(self.context_streams):
@@ -305,7 +305,7 @@ class BatchQuery:
             self.generate_configs.append(stream.generate_config)
 
         self.seq_lengths_list = self.seq_lengths_list[:self.generate_batch_size * self.num_beams]
-        self.output_token_ids = torch.IntTensor(output_token_ids)
+        self.output_token_ids = output_token_ids
         self.token_type_ids = torch.IntTensor(token_type_ids)
         self.images = images
         self.cache_block_indice = torch.IntTensor(cache_block_indice)
@@ -314,6 +314,14 @@ class BatchQuery:
         self.calculate_loss = [c.calculate_loss for c in self.generate_configs[self.generate_batch_size:]]
         self.check()
 
+    def _alloc_output_token_ids(self, batch_size: int, max_length: int) -> torch.Tensor:
+        numel = batch_size * max_length
+        if self._output_token_ids_buffer.numel() < numel:
+            self._output_token_ids_buffer = torch.empty(
+                (max(numel, self._output_token_ids_buffer.numel() * 2),), dtype=torch.int32)
+        # contiguous view over buffer head, only needs a memset instead of malloc
+        return self._output_token_ids_buffer[:numel].view(batch_size, max_length).zero_()
+
     def update_all_errors(self, err: str):
         for stream in self.streams:
             stream.stop_and_release(err)
@@ -348,32 +356,68 @@ class BatchQuery:
             update_from_pos = max(self.max_seq_length, self.max_context_length)
         return self.model_output.update_token_ids[start: end, update_from_pos: update_from_pos + slice_len].contiguous()
 
+    @staticmethod
+    def _rows_to_host(tensor: Optional[torch.Tensor], stream_idxs: List[int],
+                      num_beams: int) -> Dict[int, torch.Tensor]:
+        # gather rows of given streams on device and copy them in one d2h, other rows never leave device.
+        # rows are clamped like the per stream slice, under beam search hidden states have one row per context stream
+        if tensor is None or len(stream_idxs) == 0:
+            return {}
+        num_rows = tensor.shape[0]
+        row_ranges = [range(min(idx * num_beams, num_rows), min((idx + 1) * num_beams, num_rows))
+                      for idx in stream_idxs]
+        rows = [row for row_range in row_ranges for row in row_range]
+        host_rows = tensor.index_select(0, torch.tensor(rows, dtype=torch.int64, device=tensor.device)).cpu()
+        host_tensors: Dict[int, torch.Tensor] = {}
+        offset = 0
+        for idx, row_range in zip(stream_idxs, row_ranges):
+            host_tensors[idx] = host_rows[offset: offset + len(row_range)]
+            offset += len(row_range)
+        return host_tensors
+
     def update_streams(self):
         def try_get(list, idx1, idx2):
             return list[idx1:idx2] if list is not None else None
 
-        finished = self.model_output.finished.tolist()
-        for i, stream in enumerate(self.streams):
-            start_idx = i * self.num_beams
-            end_idx = (i + 1) * self.num_beams
-            num_new_tokens = self.model_output.update_length[i] # for sepculative decoding
-            stream.medusa_state = self.model_output.medusa_states[i] if self.model_output.medusa_states else None
+        model_output = self.model_output
+        num_beams = self.num_beams
+        finished = model_output.finished.tolist()
+        # convert once for whole batch instead of per stream
+        cum_log_probs = model_output.cum_log_probs.tolist() if model_output.cum_log_probs is not None else None
+        # same for all streams, avoid recomputing max over batch in slice_output_token
+        update_from_pos = self.max_token_len
+        streams = self.streams
+        # executor has synchronized before update, copy outputs requested by clients to host now,
+        # so that rendering them on event loop does not wait for kernels of later steps
+        host_hidden_states = self._rows_to_host(
+            model_output.hidden_states,
+            [i for i, s in enumerate(streams) if s.generate_config.return_hidden_states], num_beams)
+        host_logits = self._rows_to_host(
+            model_output.logits,
+            [i for i, s in enumerate(streams) if s.generate_config.return_logits], num_beams)
+        for i, stream in enumerate(streams):
+            start_idx = i * num_beams
+            end_idx = start_idx + num_beams
+            num_new_tokens = model_output.update_length[i] # for sepculative decoding
+            stream.medusa_state = model_output.medusa_states[i] if model_output.medusa_states else None
 
             new_tokens = self.slice_output_token(
-                start_idx, end_idx, num_new_tokens).reshape(self.num_beams, -1)
-            if (self.num_beams > 1) and (start_idx < len(self.seq_lengths_list)):
+                start_idx, end_idx, num_new_tokens, update_from_pos).reshape(num_beams, -1)
+            if (num_beams > 1) and (start_idx < len(self.seq_lengths_list)):
                 # previous generated tokens
                 generate_start_pos = self.context_lengths_list[start_idx]
                 generated_length = self.seq_lengths_list[start_idx] - generate_start_pos
                 previous_tokens = self.slice_output_token(
-                    start_idx, end_idx, generated_length, generate_start_pos).reshape(self.num_beams, -1)
+                    start_idx, end_idx, generated_length, generate_start_pos).reshape(num_beams, -1)
                 new_tokens = torch.concatenate([previous_tokens, new_tokens], dim=1)
             stream.update(new_tokens,
                           num_new_tokens,
                           finished[start_idx],
-                          try_get(self.model_output.hidden_states, start_idx, end_idx),
-                          try_get(self.model_output.logits, start_idx, end_idx),
-                          try_get(self.model_output.cum_log_probs, start_idx, end_idx))
+                          host_hidden_states[i] if i in host_hidden_states
+                              else try_get(model_output.hidden_states, start_idx, end_idx),
+                          host_logits[i] if i in host_logits
+                              else try_get(model_output.logits, start_idx, end_idx),
+                          try_get(cum_log_probs, start_idx, end_idx))
             stream.check_timeout()
             if stream.finished or stream.stopped:
                 self.remove_stream(stream)
@@ -5,7 +5,7 @@ import time
 import threading
 import traceback
 import asyncio
-from typing import AsyncGenerator
+from typing import AsyncGenerator, List, Optional, Tuple
 from maga_transformer.utils.util import get_mem_info, AtomicCounter
 from maga_transformer.config.gpt_init_model_parameters import GptInitModelParameters
 from maga_transformer.models.base_model import GenerateInput, GenerateOutput
@@ -13,10 +13,11 @@ from maga_transformer.async_decoder_engine.scheduler import Scheduler
 from maga_transformer.config.exceptions import ExceptionType, FtRuntimeException
 from maga_transformer.distribute.worker_info import g_parallel_info
 from maga_transformer.metrics import GaugeMetrics, kmonitor
-from maga_transformer.utils.time_util import Timer
+from maga_transformer.utils.time_util import Timer, current_time_ms
 from maga_transformer.async_decoder_engine.normal_model_executor import ExecutorBase
 from maga_transformer.async_decoder_engine.generate_stream import GenerateStream
 from maga_transformer.utils.model_weight import LoraResourceHolder
+from maga_transformer.utils.nvtx_util import nvtx_range_push, nvtx_range_pop
 
 class DecoderEngine:
     def __init__(self, executor: ExecutorBase, scheduler: Scheduler, config: GptInitModelParameters) -> None:
@@ -24,6 +25,12 @@ class DecoderEngine:
         self.scheduler_ = scheduler
         self.config_ = config
         self.wait_decode_counter_ = AtomicCounter()
+        # futures of coroutines waiting for next step, resolved from engine thread
+        self.step_waiters_: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self.step_waiters_lock_ = threading.Lock()
+        # min interval between two streaming outputs of one stream, steps in between are merged into next output
+        self.stream_yield_interval_ms_ = int(os.environ.get('STREAM_YIELD_INTERVAL_MS', 0))
+        logging.info(f'stream_yield_interval_ms: {self.stream_yield_interval_ms_}')
         logging.info(f'last mem info:{get_mem_info().used} {get_mem_info().free}')
 
     def start(self):
@@ -57,6 +64,7 @@ class DecoderEngine:
 
     async def _generate_loop(self, stream: GenerateStream, init_counter: int):
         counter = init_counter
+        last_yield_time_ms: Optional[float] = None
         while True:
             while True:
                 new_counter = self.wait_decode_counter_.get()
@@ -65,13 +73,45 @@ class DecoderEngine:
                 if new_counter != counter:
                     counter = new_counter
                     break
-                await asyncio.sleep(0.001)
-                
+                await self._wait_next_step(counter)
+
+            # first token is never delayed, and output always carries all tokens so skipped steps are not lost
+            if self.stream_yield_interval_ms_ > 0 and last_yield_time_ms is not None and not stream.finished \
+                    and current_time_ms() - last_yield_time_ms < self.stream_yield_interval_ms_:
+                continue
             output = stream.output
+            if output.generate_outputs[0].aux_info.iter_count > 0:
+                last_yield_time_ms = current_time_ms()
             yield output
             if output.generate_outputs[0].finished:
                 break
 
+    async def _wait_next_step(self, counter: int):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self.step_waiters_lock_:
+            self.step_waiters_.append((loop, future))
+        # register before checking counter, so that a step finished in between is not missed
+        if self.wait_decode_counter_.get() != counter:
+            return
+        await future
+
+    def _notify_step_waiters(self):
+        with self.step_waiters_lock_:
+            waiters = self.step_waiters_
+            self.step_waiters_ = []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(self._set_future_done, future)
+            except RuntimeError:
+                # event loop already closed
+                pass
+
+    @staticmethod
+    def _set_future_done(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
+
     def report_metric(self, cost_ms: float):
         kmonitor.report(GaugeMetrics.ASYNC_BATCH_SIZE_METRIC,
                         self.scheduler_.running_batch_size())
@@ -106,22 +146,29 @@ class DecoderEngine:
         try:
             with Timer() as t:
                 be = time.perf_counter()
-                torch.cuda.nvtx.range_push('pre_input')
+                nvtx_range_push('pre_input')
                 batch_query = self.scheduler_.schedule()
                 if batch_query.total_batch_size == 0 and g_parallel_info.tp_rank == 0:
-                    torch.cuda.nvtx.range_pop()
-                    time.sleep(0.001)
+                    nvtx_range_pop()
+                    # waiting streams may have been evicted as stopped, let their generate loops observe it
+                    self._notify_step_waiters()
+                    if self.scheduler_.wait_stream_size() > 0:
+                        # waiting streams can not be scheduled yet, retry later
+                        time.sleep(0.001)
+                    else:
+                        # timeout keeps stop flag responsive
+                        self.scheduler_.wait_for_stream(timeout=0.1)
                     return
                 batch_query.generate_model_input()
                 batch_query.tp_sync()
-                torch.cuda.nvtx.range_pop()
+                nvtx_range_pop()
 
                 self.executor_.process(batch_query)
 
-                torch.cuda.nvtx.range_push('update')
+                nvtx_range_push('update')
                 if g_parallel_info.tp_rank == 0:                    
                     self.scheduler_.prepare_next_step()
-                torch.cuda.nvtx.range_pop()
+                nvtx_range_pop()
 
             self.report_metric(t.cost_ms())
 
@@ -138,6 +185,7 @@ class DecoderEngine:
                 # NOTE: nccl could hang when any error. GPU may hang under CUDA error.
                 os._exit(-1)
         self.wait_decode_counter_.increment()
+        self._notify_step_waiters()
 
     def run_engine(self):
         while not self.need_stop_:
@@ -208,7 +208,7 @@ class GenerateStream(BaseModel):
                finished: bool,
                hidden_states: Optional[torch.Tensor],
                logits: Optional[torch.Tensor],
-               cum_log_probs: Optional[torch.Tensor]):
+               cum_log_probs: Optional[List[float]]):
         with self._lock:
             if self._output.aux_info.iter_count == 0:
                 self._report_first_token_rt()
@@ -241,7 +241,7 @@ class GenerateStream(BaseModel):
             self._output.aux_info.input_len = self._input.prompt_length
             self._output.aux_info.prefix_len = self._input.prefix_length
             self._output.aux_info.output_len = self._output.output_ids.shape[-1]
-            self._output.aux_info.cum_log_probs = cum_log_probs.tolist() if cum_log_probs is not None else None
+            self._output.aux_info.cum_log_probs = cum_log_probs
             self._output.aux_info.iter_count += 1
             self._output.aux_info.reuse_len = self._reuse_length
 
@@ -3,7 +3,7 @@ import torch
 import logging
 import random
 from enum import Enum
-from typing import List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 from maga_transformer.config.gpt_init_model_parameters import GptInitModelParameters
 from maga_transformer.async_decoder_engine.batch_query import BatchQuery, ModelOutput
 from maga_transformer.async_decoder_engine.cache_manager import CacheManager
@@ -14,6 +14,7 @@ from maga_transformer.models.base_model import BaseModel
 from maga_transformer.ops.gpt_ops.gpt_op import GptOp
 from maga_transformer.distribute.worker_info import g_parallel_info
 from maga_transformer.utils.util import to_cuda, to_cpu
+from maga_transformer.utils.nvtx_util import nvtx_range
 
 DEFAULT_NEW_SAMPLER_BATCH_SIZE=128
 
@@ -43,6 +44,10 @@ class NormalModelExecutor(ExecutorBase):
     def __init__(self, model_ops: ModelOps, cache_manager: CacheManager):
         self.model_ops = model_ops
         self.cache_manager_ = cache_manager
+        # reused across steps as sampler finished flags, grown on demand
+        self.finished_buffer_: Optional[torch.Tensor] = None
+        # pinned host buffers for per-step model outputs, keyed by name
+        self.host_buffers_: Dict[str, torch.Tensor] = {}
         dump_engine_to_table(self.create_config_json())
 
     @property
@@ -53,6 +58,27 @@ class NormalModelExecutor(ExecutorBase):
     def _to_cuda_tensor(t: Optional[List[Any]], dtype: torch.dtype=torch.int32):
         return to_cuda(torch.tensor(t, dtype=dtype)) if t is not None else None
 
+    def _alloc_finished(self, size: int) -> torch.Tensor:
+        if self.finished_buffer_ is None or self.finished_buffer_.numel() < size:
+            self.finished_buffer_ = torch.empty((size,), dtype=torch.bool, device="cuda:0")
+        return self.finished_buffer_[:size].zero_()
+
+    # NOTE: returned tensor is only valid until next call with same name
+    def _pinned_host_buffer(self, name: str, dtype: torch.dtype, numel: int) -> torch.Tensor:
+        buffer = self.host_buffers_.get(name)
+        if buffer is None or buffer.dtype != dtype or buffer.numel() < numel:
+            # grow with headroom, output_token_ids gets longer every step
+            capacity = numel if buffer is None else max(numel, buffer.numel() * 2)
+            buffer = torch.empty((capacity,), dtype=dtype, pin_memory=True)
+            self.host_buffers_[name] = buffer
+        return buffer[:numel]
+
+    # NOTE: returned tensor must not be read before stream synchronized
+    def _async_to_host(self, name: str, t: torch.Tensor) -> torch.Tensor:
+        host_tensor = self._pinned_host_buffer(name, t.dtype, t.numel()).view(t.shape)
+        host_tensor.copy_(t, non_blocking=True)
+        return host_tensor
+
     def process(self, batch_query: BatchQuery) -> None:
         all_hidden_states = self._process(batch_query)
         hidden_states = self._select_last_hidden_states(batch_query, all_hidden_states)
@@ -60,7 +86,7 @@ class NormalModelExecutor(ExecutorBase):
         self._calculate_loss(batch_query, all_hidden_states)
         if g_parallel_info.tp_size > 1 and g_parallel_info.tp_rank > 0:
             return
-        with torch.cuda.nvtx.range('post_process'):
+        with nvtx_range('post_process'):
             self._post_process(batch_query, logits, hidden_states)
 
     def create_config_json(self):
@@ -70,6 +96,9 @@ class NormalModelExecutor(ExecutorBase):
         return config_json
 
     def _select_last_hidden_states(self, batch_query: BatchQuery, hidden_states: torch.Tensor):
+        # decode only step has exactly one token per beam, selection is identity
+        if batch_query.context_batch_size == 0:
+            return hidden_states
         index_list = list(range(0, batch_query.generate_batch_size * batch_query.num_beams))
         offset = batch_query.generate_batch_size * batch_query.num_beams - 1
         for i in range(0, batch_query.context_batch_size):
@@ -84,7 +113,7 @@ class NormalModelExecutor(ExecutorBase):
         return hidden_states[offset:offset + batch_query.context_query_context_lengths_list[idx],...]
 
     def _process(self, batch_query: BatchQuery) -> torch.Tensor:
-        with torch.cuda.nvtx.range('pre_process'):
+        with nvtx_range('pre_process'):
             input_embeds, attention_mask, position_ids, token_type_ids = self._pre_process(batch_query)
             k_cache, v_cache = self.cache_manager_.get_kv_cache_base()
             k_cache_scale, v_cache_scale = self.cache_manager_.get_kv_cache_scale_base()
@@ -93,7 +122,7 @@ class NormalModelExecutor(ExecutorBase):
         input_lengths=torch.tensor(batch_query.context_lengths_list, dtype=torch.int32)
         sequence_lengths=torch.tensor([i - 1 for i in batch_query.seq_lengths_list], dtype=torch.int32)
 
-        with torch.cuda.nvtx.range('run_model'):
+        with nvtx_range('run_model'):
             hidden_states = self.model_ops.gpt_op.forward(
                 decoder_input=input_embeds,
                 key_cache=k_cache,
@@ -143,8 +172,12 @@ class NormalModelExecutor(ExecutorBase):
         combo_tokens: List[int] = []
         combo_token_types: List[int] = []
         model = self.model_ops.model
-        for i in range(batch_query.generate_batch_size):
-            combo_tokens.extend(batch_query.generate_query_last_token(i).numpy().tolist())
+        if batch_query.generate_batch_size > 0:
+            # gather last token of all decode beams at once instead of slicing per stream
+            generate_rows = batch_query.generate_batch_size * batch_query.num_beams
+            last_token_pos = torch.tensor(batch_query.seq_lengths_list[:generate_rows], dtype=torch.long) - 1
+            combo_tokens.extend(
+                batch_query.output_token_ids[torch.arange(generate_rows), last_token_pos].tolist())
         combo_token_types.extend(model.extend_generate_combo_token_types(combo_tokens))
         for i in range(batch_query.context_batch_size):
             combo_tokens.extend(batch_query.context_query_output_tokens(i).numpy().tolist())
@@ -341,14 +374,16 @@ class NormalModelExecutor(ExecutorBase):
         sequence_lengths = self._to_cuda_tensor(gen_lengths)
         # TODO: These tensors are allocated on each iteration. Try allocate them once for each query.
 
-        finished = torch.zeros((batch_query.total_batch_size * batch_query.num_beams), device="cuda:0").bool()
+        finished = self._alloc_finished(batch_query.total_batch_size * batch_query.num_beams)
         self._reconstruct_sampler(batch_query)
 
         token_ids = to_cuda(batch_query.output_token_ids.permute(1, 0).contiguous())
 
-        cum_log_probs = torch.concat(
-            [stream.cum_log_probs for stream in batch_query.streams], dim=0
-        ).to("cuda:0")
+        # concat into pinned buffer and upload async, buffer is not rewritten before the synchronize below
+        input_cum_log_probs = self._pinned_host_buffer(
+            'input_cum_log_probs', torch.float32, batch_query.total_batch_size * batch_query.num_beams)
+        torch.concat([stream.cum_log_probs for stream in batch_query.streams], dim=0, out=input_cum_log_probs)
+        cum_log_probs = input_cum_log_probs.to("cuda:0", non_blocking=True)
         output_log_probs = torch.zeros((batch_query.total_batch_size), dtype=torch.float, device='cuda:0')
         index_log_prob = None
         if batch_query.record_index_prob is not None:
@@ -374,12 +409,19 @@ class NormalModelExecutor(ExecutorBase):
         ))
 
         output_token_ids = token_ids.permute(1, 0)
+        # issue all d2h copies first and wait once, instead of one implicit sync per .cpu()
+        host_finished = self._async_to_host('finished', finished)
+        host_output_token_ids = self._async_to_host('output_token_ids', output_token_ids)
+        host_cum_log_probs = self._async_to_host('cum_log_probs', cum_log_probs)
+        torch.cuda.current_stream().synchronize()
+        # staging buffers are rewritten by next process(), model output must own its tensors
+        # since callers like speculative gen keep them across calls
         batch_query.update_output(ModelOutput(
-            finished=finished.cpu(),
+            finished=host_finished.clone(),
             update_length=[1] * batch_query.total_batch_size,
-            update_token_ids=output_token_ids.cpu(),
+            update_token_ids=host_output_token_ids.clone(),
             hidden_states=hidden_states,
             logits=logits,
-            cum_log_probs=cum_log_probs.cpu(),
+            cum_log_probs=host_cum_log_probs.clone(),
             output_log_probs=output_log_probs,
             output_index_prob=index_log_prob))
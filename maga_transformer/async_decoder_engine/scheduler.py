@@ -1,5 +1,6 @@
 import os
 import logging
+import threading
 from collections import deque
 from typing import Any, List, Optional, Union, Dict
 
@@ -26,6 +27,8 @@ class Scheduler:
         self.batch_query = BatchQuery(gen_num_per_circle, nccl_op, config.use_expert_attention)
         self._waiting_streams: ThreadSafeDeque = ThreadSafeDeque()
         self._schedule_strategy = create_schedule_strategy(config, stream_cache_manager)
+        # notified when new streams are enqueued, so that idle engine does not need to poll
+        self._work_cv = threading.Condition()
 
     # just for perf test
     def enable_perf_test_schedule_strategy(self):
@@ -38,9 +41,20 @@ class Scheduler:
         return config_json
 
     def enqueue(self, stream: GenerateStream):
-        self._stream_cache_manager.update_prefix(stream)
-        self._waiting_streams.append(stream)
- 
+        self.enqueue_batch([stream])
+
+    # streams are published under one lock, so that they are always visible to the same schedule cycle
+    def enqueue_batch(self, streams: List[GenerateStream]):
+        for stream in streams:
+            self._stream_cache_manager.update_prefix(stream)
+        self._waiting_streams.extend(streams)
+        with self._work_cv:
+            self._work_cv.notify_all()
+
+    def wait_for_stream(self, timeout: float) -> bool:
+        with self._work_cv:
+            return self._work_cv.wait_for(lambda: self.wait_stream_size() > 0, timeout)
+
     def _schedule_streams(self, streams: List[GenerateStream]) -> List[GenerateStream]:
         new_streams = []
         for stream in streams:
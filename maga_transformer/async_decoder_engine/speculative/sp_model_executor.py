@@ -6,6 +6,7 @@ from maga_transformer.distribute.worker_info import g_parallel_info
 from maga_transformer.config.generate_config import GenerateConfig
 from maga_transformer.async_decoder_engine.batch_query import BatchQuery, ModelOutput
 from maga_transformer.async_decoder_engine.normal_model_executor import NormalModelExecutor, ModelOps, ExecutorBase
+from maga_transformer.utils.nvtx_util import nvtx_range
 
 class SpModelExecutor(ExecutorBase):
     def __init__(self, validate_executor: NormalModelExecutor, sp_executor: NormalModelExecutor, gen_num: int):
@@ -18,9 +19,9 @@ class SpModelExecutor(ExecutorBase):
         return self.validate_executor.base_model_ops
 
     def process(self, batch_query: BatchQuery) -> None:
-        with torch.cuda.nvtx.range("speculative gen"):
+        with nvtx_range("speculative gen"):
             cum_probs, output_tokens = self._speculative_gen(batch_query)
-        with torch.cuda.nvtx.range("speculative validate"):
+        with nvtx_range("speculative validate"):
             finished, hidden_states, logits, dynamic_decoder_tokens, update_length = self._speculative_validate(batch_query, cum_probs, output_tokens)
             if g_parallel_info.tp_rank > 0:
                 return
@@ -0,0 +1,58 @@
+import torch
+from unittest import TestCase, main, mock
+from maga_transformer.async_decoder_engine.batch_query import BatchQuery, ModelOutput
+
+class BatchQueryTest(TestCase):
+    @staticmethod
+    def _create_stream(return_hidden_states: bool, return_logits: bool):
+        stream = mock.MagicMock()
+        stream.generate_config.return_hidden_states = return_hidden_states
+        stream.generate_config.return_logits = return_logits
+        stream.finished = False
+        stream.stopped = False
+        return stream
+
+    def test_rows_to_host(self):
+        tensor = torch.arange(12, dtype=torch.float32).view(6, 2)
+        host_tensors = BatchQuery._rows_to_host(tensor, [0, 2], 2)
+        self.assertEqual(set(host_tensors.keys()), {0, 2})
+        self.assertTrue(torch.equal(host_tensors[0], tensor[0:2]))
+        self.assertTrue(torch.equal(host_tensors[2], tensor[4:6]))
+        self.assertEqual(BatchQuery._rows_to_host(tensor, [], 2), {})
+        self.assertEqual(BatchQuery._rows_to_host(None, [0], 2), {})
+
+    def test_rows_to_host_clamped(self):
+        # beam search context step: one hidden states row per context stream
+        tensor = torch.arange(6, dtype=torch.float32).view(3, 2)
+        host_tensors = BatchQuery._rows_to_host(tensor, [1, 2], 2)
+        self.assertTrue(torch.equal(host_tensors[1], tensor[2:3]))
+        self.assertEqual(host_tensors[2].shape, (0, 2))
+
+    def test_update_streams_beam_search_context(self):
+        num_beams = 2
+        streams = [self._create_stream(True, True), self._create_stream(True, False), self._create_stream(False, False)]
+        batch_query = BatchQuery(gen_num_per_circle=1, nccl_op=None)
+        batch_query.context_streams = streams
+        batch_query.context_batch_size = len(streams)
+        batch_query.num_beams = num_beams
+        batch_query.context_lengths_list = [3, 3, 3]
+        hidden_states = torch.arange(12, dtype=torch.float32).view(3, 4)
+        logits = torch.arange(30, dtype=torch.float32).view(6, 5)
+        batch_query.update_output(ModelOutput(
+            finished=torch.zeros((6,), dtype=torch.bool),
+            update_length=[1, 1, 1],
+            update_token_ids=torch.zeros((6, 8), dtype=torch.int32),
+            hidden_states=hidden_states,
+            logits=logits,
+            cum_log_probs=torch.zeros((6,), dtype=torch.float32)))
+        batch_query.update_streams()
+
+        for i, stream in enumerate(streams):
+            args = stream.update.call_args[0]
+            self.assertTrue(torch.equal(args[3], hidden_states[i * num_beams: (i + 1) * num_beams]))
+            self.assertTrue(torch.equal(args[4], logits[i * num_beams: (i + 1) * num_beams]))
+        self.assertEqual(streams[1].update.call_args[0][3].shape, (1, 4))
+        self.assertEqual(streams[2].update.call_args[0][3].shape, (0, 4))
+
+if __name__ == '__main__':
+    main()
@@ -131,6 +131,27 @@ class DecoderEngineTest(TestCase):
         finally:
             pipeline.model.stop()
 
+    @mock.patch.dict('os.environ', {'STREAM_YIELD_INTERVAL_MS': '100000'})
+    def test_stream_yield_interval(self) -> None:
+        pipeline = self.create_pipeline()
+        try:
+            engine = pipeline.model.decoder_engine_
+            self.assertEqual(engine.stream_yield_interval_ms_, 100000)
+            outs = [_ for _ in pipeline("please write a story about dog", max_new_tokens=32, top_k=1)]
+            iter_counts = [out.generate_outputs.generate_outputs[0].aux_info.iter_count for out in outs]
+            # first token is yielded right away, later steps within interval are merged until finished
+            self.assertEqual(len([count for count in iter_counts if count > 0]), 2)
+            self.assertTrue(outs[-1].generate_outputs.generate_outputs[0].finished)
+
+            engine.stream_yield_interval_ms_ = 0
+            ref_outs = [_ for _ in pipeline("please write a story about dog", max_new_tokens=32, top_k=1)]
+            self.assertGreater(len(ref_outs), len(outs))
+            # merged output still carries all tokens
+            self.assertEqual(outs[-1].generate_texts, ref_outs[-1].generate_texts)
+            self.assertEqual(iter_counts[-1], ref_outs[-1].generate_outputs.generate_outputs[0].aux_info.iter_count)
+        finally:
+            pipeline.model.stop()
+
     @mock.patch('maga_transformer.async_decoder_engine.normal_model_executor.NormalModelExecutor._process')
     def test_error_internal(self, process) -> None:
         pipeline = self.create_pipeline()
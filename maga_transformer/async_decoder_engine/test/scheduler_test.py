@@ -105,6 +105,26 @@ class SchedulerTest(TestCase):
         self.assertEqual(stream2.block_indice, [[]])
         self.assertEqual(scheduler._stream_cache_manager.cache_manager_.free_block_nums, 7)
 
+    @mock.patch.dict('os.environ', {'GENERATE_RESERVE_BLOCKS': '0'})
+    def test_enqueue_batch(self):
+        config, cache_config = self._init_config()
+        cache_manager = CacheManager(cache_config, None)
+        stream_cache_manager = StreamCacheManager(
+            config, cache_manager, 1)
+        scheduler = Scheduler(config, stream_cache_manager)
+        generate_config: GenerateConfig = GenerateConfig(
+            using_hf_sampling=False)
+        streams = [GenerateStream(GenerateInput(
+            token_ids=torch.tensor([1,2,3]),
+            generate_config=generate_config)) for _ in range(3)]
+        scheduler.enqueue_batch(streams)
+        self.assertEqual(scheduler.wait_stream_size(), 3)
+        self.assertTrue(scheduler.wait_for_stream(timeout=0))
+        batch_query = self._get_batch_query(scheduler)
+        self.assertEqual(scheduler.running_batch_size(), 3)
+        self.assertEqual(scheduler.wait_stream_size(), 0)
+        self.assertEqual(batch_query.context_batch_size, 3)
+
     def test_put_lack_mem(self):
         config, cache_config = self._init_config()
         cache_manager = CacheManager(cache_config, None)
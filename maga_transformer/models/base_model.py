@@ -58,6 +58,8 @@ class AuxInfo(PyBaseModel):
     beam_responses: List[str] = []
     
 class GenerateOutput(PyBaseModel):
+    # hidden_states / logits are host tensors when return_hidden_states / return_logits is set,
+    # otherwise they stay on device
     hidden_states: Optional[torch.Tensor] = None
     output_ids: Optional[torch.Tensor] = None
     input_ids: Optional[torch.Tensor] = None
@@ -1,3 +1,4 @@
+import functools
 from typing import Any, Dict
 from transformers import AutoTokenizer, PreTrainedTokenizerBase
 
@@ -8,7 +9,13 @@ from maga_transformer.models.chat_glm_v3 import ChatGlmV3
 class ChatGlmV4(ChatGlmV3):
     @classmethod
     def get_tokenizer(cls, config: GptInitModelParameters) -> PreTrainedTokenizerBase:
-        return AutoTokenizer.from_pretrained(config.tokenizer_path, trust_remote_code=True)
+        return cls._load_tokenizer(config.tokenizer_path)
+
+    # config is unhashable, cache by path to avoid reloading vocab and remote code on every call
+    @staticmethod
+    @functools.lru_cache(maxsize=4)
+    def _load_tokenizer(tokenizer_path: str) -> PreTrainedTokenizerBase:
+        return AutoTokenizer.from_pretrained(tokenizer_path, trust_remote_code=True)
     
     @classmethod
     def update_stop_words(cls, config: GptInitModelParameters, config_json: Dict[str, Any]):
@@ -1,5 +1,6 @@
 import os
 import torch
+from torch.nn.utils.rnn import pad_sequence
 from typing import List, Dict, Any
 from transformers import PreTrainedTokenizerBase
 
@@ -7,7 +8,7 @@ from maga_transformer.config.gpt_init_model_parameters import GptInitModelParame
 from maga_transformer.utils.util import to_torch_dtype
 from maga_transformer.models.downstream_modules.custom_module import CustomModule, CustomHandler
 from maga_transformer.config.gpt_init_model_parameters import GptInitModelParameters
-from maga_transformer.models.downstream_modules.embedding.misc import combo_to_batch, EmbeddingRendererBase
+from maga_transformer.models.downstream_modules.embedding.misc import EmbeddingRendererBase
 from maga_transformer.models.downstream_modules.embedding.api_datatype import EmbeddingResponseType, EmbeddingResponseFormat
 
 
@@ -30,7 +31,7 @@ class ColbertEmbeddingRenderer(EmbeddingRendererBase):
     def similar_func(self, left: EmbeddingResponseFormat, right: EmbeddingResponseFormat):
         left_t = torch.tensor(left.embedding)
         right_t = torch.tensor(right.embedding)
-        token_scores = torch.einsum('in,jn->ij', left_t, right_t)
+        token_scores = left_t @ right_t.transpose(-1, -2)
         scores, _ = token_scores.max(-1)
         scores = torch.sum(scores) / left_t.size(0)
         return float(scores)
@@ -46,13 +47,21 @@ class ColBertEmbeddingHandler(CustomHandler):
 
     def init(self, tensor_map: Dict[str, torch.Tensor]) -> None:
         sparse_linear_dict = torch.load(self.colbert_linear_path_, map_location='cpu')
-        self.colbert_linear = torch.nn.Linear(in_features=self.config_.hidden_size, out_features=self.config_.hidden_size)
+        # weights are overwritten by checkpoint, skip fp32 random init and create on target device/dtype directly
+        self.colbert_linear = torch.nn.utils.skip_init(torch.nn.Linear,
+                                                       in_features=self.config_.hidden_size,
+                                                       out_features=self.config_.hidden_size,
+                                                       device='cuda', dtype=self.dtype_)
         self.colbert_linear.load_state_dict(sparse_linear_dict)
-        self.colbert_linear = self.colbert_linear.to(self.dtype_).cuda()
 
-    def forward(self, input_ids: torch.Tensor, hidden_states: torch.Tensor, input_lengths: torch.Tensor):
-        batch_input_ids, batch_hidden_states, batch_attention_mask = combo_to_batch(hidden_states, input_ids, input_lengths)
-        colbert_vecs = self.colbert_linear(batch_hidden_states[:, 1:])
-        colbert_vecs = colbert_vecs * batch_attention_mask[:, 1:][:, :, None].float()
+    def forward(self, input_ids: torch.Tensor, hidden_states: torch.Tensor, input_lengths: torch.Tensor) -> torch.Tensor:
+        # colbert drops first token of each sequence, select the rest from combo hidden states directly on gpu
+        # so that padding is not computed, input_lengths is on host like in combo_to_batch
+        lengths: List[int] = input_lengths.tolist()
+        keep_mask = torch.ones(sum(lengths), dtype=torch.bool)
+        host_lengths = torch.tensor(lengths)
+        keep_mask[host_lengths.cumsum(0) - host_lengths] = False
+        token_index = torch.nonzero(keep_mask).squeeze(-1).to(hidden_states.device)
+        colbert_vecs = self.colbert_linear(hidden_states.index_select(0, token_index))
         colbert_vecs = torch.nn.functional.normalize(colbert_vecs, dim=-1)
-        return colbert_vecs
\ No newline at end of file
+        return pad_sequence(list(torch.split(colbert_vecs, [length - 1 for length in lengths])), batch_first=True)
@@ -154,10 +154,12 @@ class InferenceWorker():
         batch_state: List[Any] = [None] * len(iterators)
         while True:
             for idx, itr in enumerate(iterators):
-                try:
-                    batch_state[idx] = await itr.__anext__()
-                except StopAsyncIteration:
-                    done_idxs.add(idx)
+                # exhausted generators raise StopAsyncIteration again on every call, don't poll them
+                if idx not in done_idxs:
+                    try:
+                        batch_state[idx] = await itr.__anext__()
+                    except StopAsyncIteration:
+                        done_idxs.add(idx)
                 if idx in done_idxs:
                     if batch_state[idx] is None:
                         batch_state[idx] = PipelineResponse()
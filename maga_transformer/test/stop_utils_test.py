@@ -0,0 +1,31 @@
+from unittest import TestCase, main
+from maga_transformer.utils.stop_utils import StopWordIdsCriteria
+
+class StopWordIdsCriteriaTest(TestCase):
+    def test_mixed_single_and_multi(self):
+        criteria = StopWordIdsCriteria([[2], [13, 14], [7, 8, 9]])
+        self.assertTrue(criteria([5, 6, 2]))
+        self.assertTrue(criteria([5, 13, 14]))
+        self.assertTrue(criteria([7, 8, 9]))
+        self.assertFalse(criteria([5, 6, 14]))
+        self.assertFalse(criteria([8, 9]))
+        self.assertFalse(criteria([2, 5]))
+
+    def test_empty_stop_list(self):
+        criteria = StopWordIdsCriteria([])
+        self.assertFalse(criteria([1, 2, 3]))
+        self.assertFalse(criteria([]))
+
+    def test_empty_token_ids(self):
+        criteria = StopWordIdsCriteria([[2], [13, 14]])
+        self.assertFalse(criteria([]))
+
+    def test_multi_word_last_id_is_single_word(self):
+        criteria = StopWordIdsCriteria([[14], [13, 14]])
+        self.assertTrue(criteria([14]))
+        self.assertTrue(criteria([5, 14]))
+        self.assertTrue(criteria([13, 14]))
+        self.assertFalse(criteria([13]))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+import os
+import contextlib
+import torch
+
+# nvtx markers only matter under a profiler, keep them off the hot path unless explicitly enabled
+NVTX_ENABLED = os.environ.get('RTP_LLM_PROFILE', '0') == '1'
+_NULL_RANGE = contextlib.nullcontext()
+
+def nvtx_range(msg: str):
+    return torch.cuda.nvtx.range(msg) if NVTX_ENABLED else _NULL_RANGE
+
+def nvtx_range_push(msg: str):
+    if NVTX_ENABLED:
+        torch.cuda.nvtx.range_push(msg)
+
+def nvtx_range_pop():
+    if NVTX_ENABLED:
+        torch.cuda.nvtx.range_pop()
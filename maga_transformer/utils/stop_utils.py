@@ -4,11 +4,16 @@ from transformers.generation.stopping_criteria import StoppingCriteria
 class StopWordIdsCriteria(StoppingCriteria):
     def __init__(self, stop_word_ids_list: List[List[int]]):
         self.stop_word_ids_list = stop_word_ids_list
+        # most stop words are single tokens (e.g. eos id list), check them with one set lookup
+        self.single_stop_word_ids = set(ids[0] for ids in stop_word_ids_list if len(ids) == 1)
+        self.multi_stop_word_ids_list = [ids for ids in stop_word_ids_list if len(ids) > 1]
 
     def __call__(self, token_ids: List[int], **kwargs: Any) -> bool:
-        if len(self.stop_word_ids_list) == 0:
+        if len(token_ids) == 0:
             return False
-        for stop_word_ids in self.stop_word_ids_list:
+        if token_ids[-1] in self.single_stop_word_ids:
+            return True
+        for stop_word_ids in self.multi_stop_word_ids_list:
             if len(token_ids) >= len(stop_word_ids) and token_ids[-len(stop_word_ids):] == stop_word_ids:
                 return True
         return False
@@ -10,6 +10,10 @@ class ThreadSafeDeque():
         with self.lock:
             return self.deque.append(item)
 
+    def extend(self, items):
+        with self.lock:
+            return self.deque.extend(items)
+
     def appendleft(self, item):
         with self.lock:
             return self.deque.appendleft(item)